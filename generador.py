@@ -5,9 +5,16 @@ from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.graphics.barcode import code39
 from reportlab.lib.utils import ImageReader
+from PIL import Image
 import openpyxl
 from openpyxl.styles import PatternFill  # Importamos herramienta de pintura
+from abc import ABC, abstractmethod
+from datetime import datetime
+import argparse
+import io
+import json
 import os
+import socket
 
 
 # ******************************************** zona de configuracion ********************************************
@@ -81,6 +88,19 @@ class Config:
     
     # contenido del titulo
     TITULO_CUADRO = "Sistema de Bibliotecas UNASAM"
+    
+    # indice de reimpresion
+    NOMBRE_INDICE = "indice_etiquetas.json"  # mapa codigo -> fila, lote, archivo, pagina y cuadro
+    PREFIJO_REIMPRESION = "REIMPRESION"      # prefijo de los pdf de reimpresion
+    
+    # formato de salida - "pdf" hoja a4, "zpl" o "epl" impresora termica
+    FORMATO_SALIDA = "pdf"
+    
+    # impresora termica - una etiqueta por cuadro
+    DPI_TERMICA = 203
+    SEPARACION_ETIQUETAS_TERMICA = 0.3 * cm  # espacio entre etiquetas del rollo (epl)
+    IMPRESORA_HOST = None    # si se indica, ademas de guardarse en archivo el trabajo se envia por socket
+    IMPRESORA_PUERTO = 9100
 
 
 # ********************************************** lectura de datos **********************************************
@@ -331,41 +351,114 @@ class ProcesadorLotes:
         return self.ultima_fila_excel
 
 
-# ********************************************** generacion del pdf **********************************************
+# ********************************************** indice de etiquetas **********************************************
 
-class GeneradorEtiquetas:
-    """genera el pdf con las etiquetas de codigos de barras"""
+class IndiceEtiquetas:
+    """mantiene el indice persistente codigo -> ubicacion para reimprimir sin regenerar lotes"""
+
+    def __init__(self, config):
+        self.config = config
+        self.entradas = {}
+
+    @staticmethod
+    def _normalizar(codigo):
+        """clave de busqueda - el codigo sin asteriscos ni espacios"""
+        return str(codigo).replace("*", "").strip()
+
+    def cargar(self):
+        """carga el indice existente si lo hay y retorna true si fue exitoso"""
+        if not os.path.exists(self.config.NOMBRE_INDICE):
+            return False
+
+        try:
+            with open(self.config.NOMBRE_INDICE, "r", encoding="utf-8") as archivo:
+                self.entradas = json.load(archivo)
+            print(f"indice cargado - {self.config.NOMBRE_INDICE} ({len(self.entradas)} codigos)")
+            return True
+        except Exception as e:
+            print(f"error al cargar indice - {e}")
+            self.entradas = {}
+            return False
+
+    def registrar_lote(self, lote, codigos, numero_lote, nombre_archivo, lector, cuadros_por_hoja):
+        """registra la ubicacion de cada codigo de un lote ya generado"""
+        for i, codigo in enumerate(codigos):
+            clave = self._normalizar(codigo)
+
+            # las filas vacias se rellenan con *0* - no tienen etiqueta que reimprimir
+            if clave in ("", "0"):
+                continue
+
+            fila = lote['fila_inicio'] + i
+            pagina, cuadro = divmod(i, cuadros_por_hoja)
+            self.entradas[clave] = {
+                'codigo': codigo,
+                'fila': fila,
+                'estanteria': lector.leer_valor_estanteria(fila),
+                'lote': numero_lote,
+                'archivo': nombre_archivo,
+                'pagina': pagina + 1,
+                'cuadro': cuadro + 1
+            }
+
+    def buscar(self, codigos):
+        """retorna las entradas encontradas y la lista de codigos que no estan en el indice"""
+        encontradas = []
+        faltantes = []
+        for codigo in codigos:
+            entrada = self.entradas.get(self._normalizar(codigo))
+            if entrada:
+                encontradas.append(entrada)
+            else:
+                faltantes.append(codigo)
+        return encontradas, faltantes
+
+    def guardar(self):
+        """guarda el indice en disco"""
+        try:
+            with open(self.config.NOMBRE_INDICE, "w", encoding="utf-8") as archivo:
+                json.dump(self.entradas, archivo, ensure_ascii=False, indent=1)
+            print(f"✓ Indice guardado como: {self.config.NOMBRE_INDICE}")
+            return True
+        except Exception as e:
+            print(f"error al guardar indice - {e}")
+            return False
+
+
+# ********************************************** base de generadores **********************************************
+
+class GeneradorBase(ABC):
+    """nombres de archivo, numeracion y disposicion del cuadro comunes a todos los formatos de salida"""
+    
+    EXTENSIONES_SALIDA = (".pdf", ".zpl", ".epl")  # todas cuentan para la numeracion de archivos
     
     def __init__(self, config):
         self.config = config
-        self.fuente_bold = None
-        self.fuente_code = None
-        self._cargar_fuentes()
     
-    # inicializacion 
+    @property
+    @abstractmethod
+    def extension(self):
+        """extension de los archivos que genera el formato"""
+    
+    @property
+    @abstractmethod
+    def cuadros_por_hoja(self):
+        """cuadros por pagina de salida - usado para ubicar cada codigo en el indice"""
+    
+    @abstractmethod
+    def generar_lote(self, lote, codigos, numero_archivo):
+        """genera la salida de un lote y retorna el nombre del archivo"""
+    
+    @abstractmethod
+    def generar_reimpresion(self, codigos, cuadros=None, rango_inicial="", rango_final=""):
+        """genera la salida de una reimpresion y retorna el nombre del archivo"""
+    
+    # **************************** nombres de archivo ****************************
     
-    def _cargar_fuentes(self):
-        """carga las fuentes personalizadas o usa alternativas"""
-        # fuente bold - titulos
-        if os.path.exists(self.config.RUTA_FUENTE):
-            pdfmetrics.registerFont(TTFont('OpenSans-Bold', self.config.RUTA_FUENTE))
-            self.fuente_bold = "OpenSans-Bold"
-        else:
-            print(f"aviso - no se encontro '{self.config.RUTA_FUENTE}', usando helvetica-bold")
-            self.fuente_bold = "Helvetica-Bold"
-        
-        # fuente code - texto del codigo
-        if os.path.exists(self.config.RUTA_FUENTE_CODE):
-            pdfmetrics.registerFont(TTFont('OpenSans-Code', self.config.RUTA_FUENTE_CODE))
-            self.fuente_code = "OpenSans-Code"
-        else:
-            print(f"aviso - no se encontro '{self.config.RUTA_FUENTE_CODE}', usando fuente principal")
-            self.fuente_code = self.fuente_bold
-
     def _calcular_siguiente_numero(self):
         """busca el siguiente numero de archivo basado en lo que existe en la carpeta"""
         facultad = self.config.ABREVIACION_FACULTAD
-        archivos = [f for f in os.listdir('.') if f.endswith('.pdf')]
+        archivos = [f for f in os.listdir('.') if f.endswith(self.EXTENSIONES_SALIDA)]
         
         max_numero = 0
         
@@ -385,12 +478,78 @@ class GeneradorEtiquetas:
         return str(siguiente)
     
     def _obtener_nombre_archivo(self, numero_archivo, rango_inicial, rango_final):
-        """genera el nombre del archivo pdf"""
+        """genera el nombre del archivo de un lote"""
         rango_inicial_limpio = rango_inicial.replace('*', '').replace('/', '-').replace('\\', '-').replace(':', '-')
         rango_final_limpio = rango_final.replace('*', '').replace('/', '-').replace('\\', '-').replace(':', '-')
         
-        return f"{numero_archivo}{self.config.ABREVIACION_FACULTAD} {rango_inicial_limpio} - {rango_final_limpio}.pdf"
+        return f"{numero_archivo}{self.config.ABREVIACION_FACULTAD} {rango_inicial_limpio} - {rango_final_limpio}.{self.extension}"
+    
+    def _obtener_nombre_reimpresion(self):
+        """genera el nombre del archivo de reimpresion - sin numero para no alterar la secuencia de lotes"""
+        marca = datetime.now().strftime("%Y%m%d-%H%M%S")
+        base = f"{self.config.PREFIJO_REIMPRESION} {self.config.ABREVIACION_FACULTAD} {marca}"
+        nombre_archivo = f"{base}.{self.extension}"
+        
+        # dos reimpresiones en el mismo segundo - agregar un contador para no sobrescribir
+        contador = 2
+        while os.path.exists(nombre_archivo):
+            nombre_archivo = f"{base} ({contador}).{self.extension}"
+            contador += 1
+        
+        return nombre_archivo
+    
+    # **************************** disposicion del cuadro ****************************
     
+    def _calcular_disposicion_cuadro(self):
+        """calcula la altura de cada elemento del cuadro medida desde su borde inferior"""
+        alto_titulo = 0.4 * cm
+        altura_total_visual = 1.34 * cm
+        espacio_texto_total = altura_total_visual - self.config.ALTO_BARRAS
+        
+        y_base_bloque = (self.config.ALTO_CUADRO - altura_total_visual) / 2
+        y_base_bloque += self.config.AJUSTE_VERTICAL_CODIGO
+        
+        y_barras = y_base_bloque + espacio_texto_total + 0.03 * cm
+        
+        return {
+            'titulo': self.config.ALTO_CUADRO - alto_titulo - 0.2 * cm,
+            'barras': y_barras,
+            'texto': y_barras - self.config.SEPARACION_TEXTO_BARRAS,
+            'imagenes': y_barras + self.config.DISTANCIA_Y_DESDE_CODIGO
+        }
+
+
+# ********************************************** generacion del pdf **********************************************
+
+class GeneradorEtiquetas(GeneradorBase):
+    """genera el pdf con las etiquetas de codigos de barras"""
+    
+    def __init__(self, config):
+        super().__init__(config)
+        self.fuente_bold = None
+        self.fuente_code = None
+        self._cargar_fuentes()
+    
+    # inicializacion 
+    
+    def _cargar_fuentes(self):
+        """carga las fuentes personalizadas o usa alternativas"""
+        # fuente bold - titulos
+        if os.path.exists(self.config.RUTA_FUENTE):
+            pdfmetrics.registerFont(TTFont('OpenSans-Bold', self.config.RUTA_FUENTE))
+            self.fuente_bold = "OpenSans-Bold"
+        else:
+            print(f"aviso - no se encontro '{self.config.RUTA_FUENTE}', usando helvetica-bold")
+            self.fuente_bold = "Helvetica-Bold"
+        
+        # fuente code - texto del codigo
+        if os.path.exists(self.config.RUTA_FUENTE_CODE):
+            pdfmetrics.registerFont(TTFont('OpenSans-Code', self.config.RUTA_FUENTE_CODE))
+            self.fuente_code = "OpenSans-Code"
+        else:
+            print(f"aviso - no se encontro '{self.config.RUTA_FUENTE_CODE}', usando fuente principal")
+            self.fuente_code = self.fuente_bold
+
     # **************************** dibujo de titulos ****************************
     
     def _dibujar_titulo_principal(self, c, ancho_hoja, alto_hoja, rango_inicial, rango_final):
@@ -521,20 +680,15 @@ class GeneradorEtiquetas:
         
         centro_x = x + (self.config.ANCHO_CUADRO / 2)
         
+        disposicion = self._calcular_disposicion_cuadro()
+        
         c.setFont(self.fuente_bold, self.config.TAMANO_FUENTE_CUADRO)
-        alto_titulo = 0.4 * cm
-        y_titulo = y + self.config.ALTO_CUADRO - alto_titulo - 0.2 * cm
+        y_titulo = y + disposicion['titulo']
         c.drawCentredString(centro_x, y_titulo, self.config.TITULO_CUADRO)
         
-        altura_total_visual = 1.34 * cm
-        espacio_texto_total = altura_total_visual - self.config.ALTO_BARRAS
-        
-        y_base_bloque = y + (self.config.ALTO_CUADRO - altura_total_visual) / 2
-        y_base_bloque += self.config.AJUSTE_VERTICAL_CODIGO
-        
-        y_barras = y_base_bloque + espacio_texto_total + 0.03 * cm
-        y_texto = y_barras - self.config.SEPARACION_TEXTO_BARRAS
-        y_imagenes = y_barras + self.config.DISTANCIA_Y_DESDE_CODIGO
+        y_barras = y + disposicion['barras']
+        y_texto = y + disposicion['texto']
+        y_imagenes = y + disposicion['imagenes']
         
         x_logo_unasam = x + self.config.MARGEN_X_LOGO_UNASAM
         self._dibujar_imagen(c, self.config.RUTA_LOGO_UNASAM, x_logo_unasam, y_imagenes, self.config.ALTO_IMAGENES)
@@ -603,7 +757,17 @@ class GeneradorEtiquetas:
     
     # **************************** generacion principal ****************************
     
-    def generar_pdf_lote(self, lote, codigos, numero_archivo):
+    @property
+    def extension(self):
+        """extension de los archivos generados"""
+        return "pdf"
+    
+    @property
+    def cuadros_por_hoja(self):
+        """cuadros por pagina de la hoja a4"""
+        return self.config.CUADROS_POR_HOJA
+    
+    def generar_lote(self, lote, codigos, numero_archivo):
         """genera un archivo pdf para un lote especifico"""
         nombre_archivo = self._obtener_nombre_archivo(numero_archivo, lote['rango_inicial'], lote['rango_final'])
         c = canvas.Canvas(nombre_archivo, pagesize=A4)
@@ -625,14 +789,360 @@ class GeneradorEtiquetas:
         
         c.save()
         print(f"  ✓ generado correctamente")
+        return nombre_archivo
+    
+    # **************************** reimpresion ****************************
+    
+    def generar_reimpresion(self, codigos, cuadros=None, rango_inicial="", rango_final=""):
+        """genera un pdf solo con los codigos indicados
+        
+        si se indican cuadros (1 a CUADROS_POR_HOJA, uno por codigo y sin repetir) las etiquetas
+        se dibujan en esos cuadros de una sola hoja y sin titulo, para aprovechar una hoja ya usada
+        """
+        nombre_archivo = self._obtener_nombre_reimpresion()
+        c = canvas.Canvas(nombre_archivo, pagesize=A4)
+        ancho_hoja, alto_hoja = A4
+        
+        print(f"\ngenerando: {nombre_archivo}")
+        
+        if cuadros:
+            # orden de lectura del grid - fila por fila, de izquierda a derecha
+            posiciones = [
+                (x, y)
+                for y in self._calcular_posiciones_y(alto_hoja)
+                for x in self._calcular_posiciones_x()
+            ]
+            for codigo, cuadro in zip(codigos, cuadros):
+                x, y = posiciones[cuadro - 1]
+                self._dibujar_cuadro(c, x, y, codigo)
+            c.showPage()
+        else:
+            total_codigos = len(codigos)
+            for inicio in range(0, total_codigos, self.config.CUADROS_POR_HOJA):
+                codigos_pagina = codigos[inicio:inicio + self.config.CUADROS_POR_HOJA]
+                self._dibujar_pagina(c, codigos_pagina, ancho_hoja, alto_hoja, rango_inicial, rango_final)
+                c.showPage()
+        
+        c.save()
+        print(f"  ✓ {len(codigos)} etiqueta(s) reimpresa(s)")
+        return nombre_archivo
+
+
+# ************************************** salida para impresora termica **************************************
+
+class GeneradorTermico(GeneradorBase):
+    """genera comandos nativos zpl o epl para impresoras termicas - una etiqueta por cuadro"""
+    
+    LENGUAJES = ("zpl", "epl")
+    NOMBRES_LOGOS = ("LOGOUNA", "LOGOFAC")  # nombres de los graficos almacenados en la impresora
+    PROPORCION_BARRAS = 3                   # relacion ancha / angosta del code39 - entera para que la impresora la dibuje exacta
+    
+    # fuentes residentes epl a 203 dpi - numero: (ancho, alto) de caracter en puntos
+    FUENTES_EPL = {1: (8, 12), 2: (10, 16), 3: (12, 20), 4: (14, 24)}
+    
+    def __init__(self, config, lenguaje=None):
+        super().__init__(config)
+        self.lenguaje = lenguaje or config.FORMATO_SALIDA
+        if self.lenguaje not in self.LENGUAJES:
+            raise ValueError(f"lenguaje de impresora no soportado - {self.lenguaje}")
+        self.logos = None
+    
+    @property
+    def extension(self):
+        """extension de los archivos generados - la del lenguaje de impresora"""
+        return self.lenguaje
+    
+    @property
+    def cuadros_por_hoja(self):
+        """cada etiqueta del rollo es una pagina con un solo cuadro"""
+        return 1
+    
+    # **************************** conversion de medidas ****************************
+    
+    def _a_puntos(self, valor):
+        """convierte una medida de reportlab (1/72 pulgada) a puntos de impresora"""
+        return int(round(valor * self.config.DPI_TERMICA / 72))
+    
+    def _y_desde_arriba(self, y_inferior, alto):
+        """las impresoras miden y desde el borde superior de la etiqueta"""
+        return self._a_puntos(self.config.ALTO_CUADRO - y_inferior - alto)
+    
+    # **************************** logos como graficos almacenados ****************************
+    
+    def _rasterizar_logo(self, ruta_imagen):
+        """convierte un logo a imagen monocroma del alto configurado, con ancho multiplo de 8"""
+        if not os.path.exists(ruta_imagen):
+            return None
+        
+        try:
+            imagen = Image.open(ruta_imagen).convert("RGBA")
+            fondo = Image.new("RGBA", imagen.size, "white")
+            fondo.alpha_composite(imagen)
+            
+            alto = self._a_puntos(self.config.ALTO_IMAGENES)
+            ancho = max(1, round(alto * imagen.width / imagen.height))
+            gris = fondo.convert("L").resize((ancho, alto))
+            
+            # completar en blanco hasta un byte entero por fila
+            ancho_bytes = (ancho + 7) // 8
+            lienzo = Image.new("L", (ancho_bytes * 8, alto), 255)
+            lienzo.paste(gris, (0, 0))
+            return lienzo.point(lambda p: 255 if p >= 128 else 0).convert("1"), ancho
+        except Exception as e:
+            print(f"error al convertir imagen {ruta_imagen} - {e}")
+            return None
+    
+    def _preparar_logos(self):
+        """rasteriza los logos una sola vez y los reutiliza en todos los trabajos"""
+        if self.logos is not None:
+            return self.logos
+        
+        self.logos = {}
+        rutas = (self.config.RUTA_LOGO_UNASAM, self.config.RUTA_LOGO_FACULTAD)
+        for nombre, ruta in zip(self.NOMBRES_LOGOS, rutas):
+            resultado = self._rasterizar_logo(ruta)
+            if resultado:
+                imagen, ancho = resultado
+                self.logos[nombre] = {'imagen': imagen, 'ancho': ancho}
+        
+        return self.logos
+    
+    def _comandos_logos(self):
+        """comandos que guardan los logos en la memoria flash de la impresora"""
+        comandos = b""
+        for nombre, logo in self._preparar_logos().items():
+            imagen = logo['imagen']
+            
+            if self.lenguaje == "zpl":
+                # en modo 1 de pillow el bit 1 es blanco - zpl espera 1 = negro
+                datos = bytes(byte ^ 0xFF for byte in imagen.tobytes())
+                ancho_bytes = imagen.width // 8
+                comandos += f"~DGE:{nombre}.GRF,{len(datos)},{ancho_bytes},{datos.hex().upper()}\n".encode("ascii")
+            else:
+                buffer = io.BytesIO()
+                imagen.save(buffer, format="PCX")
+                datos = buffer.getvalue()
+                comandos += f'GK"{nombre}"\nGK"{nombre}"\nGM"{nombre}"{len(datos)}\n'.encode("ascii")
+                comandos += datos + b"\n"
+        
+        return comandos
+    
+    # **************************** codigo de barras ****************************
+    
+    def _calcular_modulos_barras(self, datos):
+        """calcula el ancho de barra angosta y ancha en puntos para que el code39 entre en el cuadro"""
+        ancho_maximo = self._a_puntos(self.config.ANCHO_CUADRO - (2 * self.config.MARGEN_HORIZONTAL_BARRAS))
+        angosta = max(1, self._a_puntos(self.config.ANCHO_BARRAS))
+        
+        while True:
+            ancha = angosta * self.PROPORCION_BARRAS
+            # cada caracter - 6 barras angostas, 3 anchas y el espacio entre caracteres; mas inicio y fin
+            ancho_total = (len(datos) + 2) * (7 * angosta + 3 * ancha) - angosta
+            if ancho_total <= ancho_maximo or angosta == 1:
+                return angosta, ancha, ancho_total
+            angosta -= 1
+    
+    # **************************** comandos zpl ****************************
+    
+    @staticmethod
+    def _escapar_zpl(texto):
+        """escapa los caracteres de control zpl para usarlos con ^FH"""
+        return texto.replace("_", "_5F").replace("^", "_5E").replace("~", "_7E")
+    
+    def _texto_zpl(self, texto, x, ancho, y_inferior, tamano):
+        """campo de texto centrado con la fuente escalable de la impresora"""
+        alto = self._a_puntos(tamano)
+        # la fuente 0 ocupa aproximadamente 0.6 del alto por caracter
+        if texto and len(texto) * alto * 0.6 > ancho:
+            alto = max(10, int(ancho / (len(texto) * 0.6)))
+        y = self._y_desde_arriba(y_inferior, tamano * 0.75)
+        return f"^FO{x},{y}^A0N,{alto},{alto}^FB{ancho},1,0,C^FH_^FD{self._escapar_zpl(texto)}^FS\n"
+    
+    def _etiqueta_zpl(self, codigo):
+        """comandos zpl de una etiqueta"""
+        disposicion = self._calcular_disposicion_cuadro()
+        ancho = self._a_puntos(self.config.ANCHO_CUADRO)
+        alto = self._a_puntos(self.config.ALTO_CUADRO)
+        margen_texto = self._a_puntos(self.config.MARGEN_HORIZONTAL_TEXTO)
+        
+        comandos = f"^XA\n^CI28\n^PW{ancho}\n^LL{alto}\n"
+        comandos += self._texto_zpl(
+            self.config.TITULO_CUADRO, 0, ancho, disposicion['titulo'], self.config.TAMANO_FUENTE_CUADRO
+        )
+        
+        y_logos = self._y_desde_arriba(disposicion['imagenes'], self.config.ALTO_IMAGENES)
+        comandos += self._logos_etiqueta(ancho, y_logos, "^FO{x},{y}^XGE:{nombre}.GRF,1,1^FS\n")
+        
+        datos = codigo.replace("*", "")
+        angosta, _, ancho_barras = self._calcular_modulos_barras(datos)
+        x_barras = max(0, (ancho - ancho_barras) // 2)
+        y_barras = self._y_desde_arriba(disposicion['barras'], self.config.ALTO_BARRAS)
+        alto_barras = self._a_puntos(self.config.ALTO_BARRAS)
+        comandos += (f"^BY{angosta},{self.PROPORCION_BARRAS:.1f},{alto_barras}"
+                     f"^FO{x_barras},{y_barras}^B3N,N,{alto_barras},N,N^FH_^FD{self._escapar_zpl(datos)}^FS\n")
+        
+        comandos += self._texto_zpl(
+            codigo, margen_texto, ancho - 2 * margen_texto, disposicion['texto'], self.config.TAMANO_FUENTE_CODIGO
+        )
+        comandos += "^XZ\n"
+        return comandos.encode("utf-8")
+    
+    # **************************** comandos epl ****************************
+    
+    @staticmethod
+    def _escapar_epl(texto):
+        """escapa comillas y barras invertidas dentro de un campo epl"""
+        return texto.replace("\\", "\\\\").replace('"', '\\"')
+    
+    def _texto_epl(self, texto, x, ancho, y_inferior, tamano):
+        """campo de texto centrado con la mayor fuente residente que entre en el ancho"""
+        escala = self.config.DPI_TERMICA / 203
+        alto_deseado = self._a_puntos(tamano)
+        
+        fuente, ancho_caracter = 1, self.FUENTES_EPL[1][0] * escala
+        for numero, (ancho_f, alto_f) in sorted(self.FUENTES_EPL.items()):
+            ancho_f, alto_f = ancho_f * escala, alto_f * escala
+            if alto_f <= alto_deseado and len(texto) * ancho_f <= ancho:
+                fuente, ancho_caracter = numero, ancho_f
+        
+        x_texto = x + max(0, int((ancho - len(texto) * ancho_caracter) / 2))
+        y = self._y_desde_arriba(y_inferior, tamano * 0.75)
+        return f'A{x_texto},{y},0,{fuente},1,1,N,"{self._escapar_epl(texto)}"\n'
+    
+    def _etiqueta_epl(self, codigo):
+        """comandos epl de una etiqueta"""
+        disposicion = self._calcular_disposicion_cuadro()
+        ancho = self._a_puntos(self.config.ANCHO_CUADRO)
+        margen_texto = self._a_puntos(self.config.MARGEN_HORIZONTAL_TEXTO)
+        
+        comandos = "N\n"
+        comandos += self._texto_epl(
+            self.config.TITULO_CUADRO, 0, ancho, disposicion['titulo'], self.config.TAMANO_FUENTE_CUADRO
+        )
+        
+        y_logos = self._y_desde_arriba(disposicion['imagenes'], self.config.ALTO_IMAGENES)
+        comandos += self._logos_etiqueta(ancho, y_logos, 'GG{x},{y},"{nombre}"\n')
+        
+        datos = codigo.replace("*", "")
+        angosta, ancha, ancho_barras = self._calcular_modulos_barras(datos)
+        x_barras = max(0, (ancho - ancho_barras) // 2)
+        y_barras = self._y_desde_arriba(disposicion['barras'], self.config.ALTO_BARRAS)
+        alto_barras = self._a_puntos(self.config.ALTO_BARRAS)
+        comandos += f'B{x_barras},{y_barras},0,3,{angosta},{ancha},{alto_barras},N,"{self._escapar_epl(datos)}"\n'
+        
+        comandos += self._texto_epl(
+            codigo, margen_texto, ancho - 2 * margen_texto, disposicion['texto'], self.config.TAMANO_FUENTE_CODIGO
+        )
+        comandos += "P1\n"
+        return comandos.encode("latin-1", errors="replace")
+    
+    def _comandos_inicio_epl(self):
+        """tamano de etiqueta y separacion del rollo - se envia una vez por trabajo"""
+        ancho = self._a_puntos(self.config.ANCHO_CUADRO)
+        alto = self._a_puntos(self.config.ALTO_CUADRO)
+        separacion = self._a_puntos(self.config.SEPARACION_ETIQUETAS_TERMICA)
+        return f"q{ancho}\nQ{alto},{separacion}\n".encode("ascii")
+    
+    # **************************** composicion del trabajo ****************************
+    
+    def _logos_etiqueta(self, ancho, y, plantilla):
+        """referencias a los logos almacenados - unasam a la izquierda y facultad a la derecha"""
+        logos = self._preparar_logos()
+        comandos = ""
+        
+        nombre_unasam, nombre_facultad = self.NOMBRES_LOGOS
+        if nombre_unasam in logos:
+            x = self._a_puntos(self.config.MARGEN_X_LOGO_UNASAM)
+            comandos += plantilla.format(x=x, y=y, nombre=nombre_unasam)
+        if nombre_facultad in logos:
+            x = ancho - self._a_puntos(self.config.MARGEN_X_LOGO_FACULTAD) - logos[nombre_facultad]['ancho']
+            comandos += plantilla.format(x=x, y=y, nombre=nombre_facultad)
+        
+        return comandos
+    
+    def _componer_trabajo(self, codigos):
+        """arma un trabajo completo - solo referencia los logos ya cargados con generar_carga_logos"""
+        if self.lenguaje == "zpl":
+            return b"".join(self._etiqueta_zpl(codigo) for codigo in codigos)
+        
+        return self._comandos_inicio_epl() + b"".join(self._etiqueta_epl(codigo) for codigo in codigos)
+    
+    def _emitir(self, trabajo, nombre_archivo):
+        """guarda el trabajo en archivo y ademas lo envia a la impresora si hay una configurada
+        
+        el archivo se escribe siempre - la numeracion de lotes y el indice dependen de el
+        """
+        with open(nombre_archivo, "wb") as archivo:
+            archivo.write(trabajo)
+        print(f"  ✓ generado correctamente ({len(trabajo)} bytes)")
+        
+        if self.config.IMPRESORA_HOST:
+            try:
+                direccion = (self.config.IMPRESORA_HOST, self.config.IMPRESORA_PUERTO)
+                with socket.create_connection(direccion, timeout=10) as conexion:
+                    conexion.sendall(trabajo)
+                print(f"  ✓ enviado a {direccion[0]}:{direccion[1]}")
+            except OSError as e:
+                print(f"error al enviar a la impresora - {e}, el trabajo queda en '{nombre_archivo}'")
+    
+    def generar_carga_logos(self):
+        """genera el trabajo que guarda los logos en la impresora - se envia una sola vez, no en cada lote"""
+        comandos = self._comandos_logos()
+        if not comandos:
+            print("error - no se encontro ningun logo para cargar")
+            return None
+        
+        nombre_archivo = f"LOGOS {self.config.ABREVIACION_FACULTAD}.{self.extension}"
+        print(f"\ngenerando: {nombre_archivo}")
+        
+        self._emitir(comandos, nombre_archivo)
+        return nombre_archivo
+    
+    def generar_lote(self, lote, codigos, numero_archivo):
+        """genera un trabajo de impresora para un lote especifico"""
+        nombre_archivo = self._obtener_nombre_archivo(numero_archivo, lote['rango_inicial'], lote['rango_final'])
+        
+        print(f"\ngenerando: {nombre_archivo}")
+        print(f"  filas: {lote['fila_inicio']}-{lote['fila_fin']} ({lote['total_filas']} etiquetas)")
+        
+        self._emitir(self._componer_trabajo(codigos), nombre_archivo)
+        return nombre_archivo
+    
+    def generar_reimpresion(self, codigos, cuadros=None, rango_inicial="", rango_final=""):
+        """genera un trabajo de impresora solo con los codigos indicados"""
+        if cuadros:
+            print("aviso - la impresora termica usa etiquetas sueltas, se ignoran los cuadros indicados")
+        
+        nombre_archivo = self._obtener_nombre_reimpresion()
+        print(f"\ngenerando: {nombre_archivo}")
+        
+        self._emitir(self._componer_trabajo(codigos), nombre_archivo)
+        return nombre_archivo
 
 
 # ************************************* ejecucion principal *************************************
 
+def crear_generador(config):
+    """crea el generador que corresponde al formato de salida configurado - none si el formato no existe"""
+    if config.FORMATO_SALIDA == "pdf":
+        return GeneradorEtiquetas(config)
+    if config.FORMATO_SALIDA in GeneradorTermico.LENGUAJES:
+        return GeneradorTermico(config)
+    
+    formatos = ", ".join(("pdf",) + GeneradorTermico.LENGUAJES)
+    print(f"error - formato de salida '{config.FORMATO_SALIDA}' no soportado, use uno de: {formatos}")
+    return None
+
+
 def main():
     """funcion principal que ejecuta todo el proceso automatizado"""
     config = Config()
     
+    # validar el formato de salida antes de tocar el excel
+    generador = crear_generador(config)
+    if not generador:
+        return
+    
     # leer el excel para obtener datos
     lector = LectorExcel(config)
     if not lector.cargar_excel(): 
@@ -651,20 +1161,24 @@ def main():
         lector.cerrar()
         return
     
-    # generar PDFs y pintar excel
-    generador = GeneradorEtiquetas(config)
+    # indice de reimpresion - se conserva lo registrado en ejecuciones anteriores
+    indice = IndiceEtiquetas(config)
+    indice.cargar()
+    
+    # generar archivos y pintar excel
     numero_inicial = int(generador._calcular_siguiente_numero())
     
     print(f"\n{'=' * 60}")
-    print(f"iniciando generacion de {len(lotes)} archivo(s) PDF y pintado de Excel")
+    print(f"iniciando generacion de {len(lotes)} archivo(s) {generador.extension.upper()} y pintado de Excel")
     print(f"numero inicial: {numero_inicial}")
     print(f"{'=' * 60}")
     
     for i, lote in enumerate(lotes):
-        # generar PDF
+        # generar archivo del lote
         numero_archivo = str(numero_inicial + i)
         codigos = lector.leer_codigos_rango(lote['fila_inicio'], lote['fila_fin'])
-        generador.generar_pdf_lote(lote, codigos, numero_archivo)
+        nombre_archivo = generador.generar_lote(lote, codigos, numero_archivo)
+        indice.registrar_lote(lote, codigos, numero_archivo, nombre_archivo, lector, generador.cuadros_por_hoja)
         
         # pintar excel - si se cargo correctamente
         if pintor_activo:
@@ -677,13 +1191,119 @@ def main():
     if pintor_activo:
         pintor.guardar()
     
+    # guardar el indice
+    indice.guardar()
+    
     print(f"\n{'=' * 60}")
     print(f"✓ proceso completado exitosamente")
     print(f"  archivos generados: {len(lotes)}")
     if pintor_activo:
         print(f"  excel pintado: {config.NOMBRE_EXCEL_SALIDA}")
+    print(f"  indice: {config.NOMBRE_INDICE}")
+    if isinstance(generador, GeneradorTermico):
+        print("  logos: si la impresora aun no los tiene, cargarlos una vez con 'python generador.py logos'")
     print(f"{'=' * 60}\n")
 
 
+def reimprimir(codigos, cuadros=None):
+    """reimprime solo los codigos indicados usando el indice - no lee el excel"""
+    # cada cuadro va con el codigo en la misma posicion
+    if cuadros and len(cuadros) != len(codigos):
+        print(f"error - {len(codigos)} codigo(s) pero {len(cuadros)} cuadro(s), indique un cuadro por codigo")
+        return
+    
+    config = Config()
+    
+    generador = crear_generador(config)
+    if not generador:
+        return
+    
+    indice = IndiceEtiquetas(config)
+    if not indice.cargar():
+        print(f"error - no hay indice '{config.NOMBRE_INDICE}', ejecute primero la generacion completa")
+        return
+    
+    encontradas, faltantes = indice.buscar(codigos)
+    for codigo in faltantes:
+        print(f"aviso - el codigo '{codigo}' no esta en el indice")
+    
+    # sin un codigo los demas se correrian de cuadro - mejor no imprimir nada
+    if cuadros and faltantes:
+        print("error - con --cuadros todos los codigos deben estar en el indice")
+        return
+    
+    if not encontradas:
+        print("error - ningun codigo para reimprimir")
+        return
+    
+    for entrada in encontradas:
+        print(f"  {entrada['codigo']}: fila {entrada['fila']}, lote {entrada['lote']}, "
+              f"'{entrada['archivo']}' pagina {entrada['pagina']} cuadro {entrada['cuadro']}")
+    
+    generador.generar_reimpresion(
+        [entrada['codigo'] for entrada in encontradas],
+        cuadros,
+        encontradas[0]['estanteria'],
+        encontradas[-1]['estanteria']
+    )
+
+
+def cargar_logos():
+    """genera el trabajo unico que guarda los logos en la impresora termica"""
+    config = Config()
+    
+    generador = crear_generador(config)
+    if not generador:
+        return
+    
+    if not isinstance(generador, GeneradorTermico):
+        print("error - la carga de logos solo aplica a los formatos de impresora termica (zpl, epl)")
+        return
+    
+    generador.generar_carga_logos()
+
+
+def _leer_cuadros(valor):
+    """convierte '4,5,12' en [4, 5, 12] para la opcion --cuadros y valida rango y repetidos"""
+    try:
+        cuadros = [int(cuadro) for cuadro in valor.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"'{valor}' no es valido - use numeros de cuadro separados por coma (ej. 4,5,12)"
+        )
+    
+    if any(cuadro < 1 or cuadro > Config.CUADROS_POR_HOJA for cuadro in cuadros):
+        raise argparse.ArgumentTypeError(f"los cuadros deben estar entre 1 y {Config.CUADROS_POR_HOJA}")
+    
+    if len(set(cuadros)) != len(cuadros):
+        raise argparse.ArgumentTypeError("hay cuadros repetidos, cada etiqueta necesita un cuadro distinto")
+    
+    return cuadros
+
+
+def _leer_argumentos():
+    """lee la linea de comandos - sin argumentos se ejecuta la generacion completa"""
+    parser = argparse.ArgumentParser(description="generador de etiquetas con codigo de barras")
+    subparsers = parser.add_subparsers(dest="comando")
+    
+    parser_reprint = subparsers.add_parser("reprint", help="reimprime solo los codigos indicados")
+    parser_reprint.add_argument("codigos", nargs="+", help="codigos a reimprimir")
+    parser_reprint.add_argument(
+        "--cuadros",
+        type=_leer_cuadros,
+        help="cuadros libres de una hoja ya usada, separados por coma (ej. 4,5,12)"
+    )
+    
+    subparsers.add_parser("logos", help="guarda los logos en la impresora termica - una sola vez")
+    
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    argumentos = _leer_argumentos()
+    if argumentos.comando == "reprint":
+        reimprimir(argumentos.codigos, argumentos.cuadros)
+    elif argumentos.comando == "logos":
+        cargar_logos()
+    else:
+        main()
\ No newline at end of file